@@ -0,0 +1,129 @@
+from conftest import work_order
+
+
+def test_shared_map_fork_copies_only_the_written_bucket(cms):
+    parent = cms.SharedMap((i, str(i)) for i in range(1000))
+    child = parent.fork()
+    child[5] = "five"
+    del child[700]
+    child[5000] = "new"
+    assert parent[5] == "5" and 700 in parent and 5000 not in parent
+    assert child[5] == "five" and 700 not in child and child[5000] == "new"
+    assert len(parent) == 1000 and len(child) == 1000
+    assert list(child) == sorted(child)
+    # buckets 1 and 3 are still the parent's own dicts
+    assert child._buckets[1] is parent._buckets[1] and child._buckets[3] is parent._buckets[3]
+    assert child._buckets[0] is not parent._buckets[0]
+    # the parent gave up its buckets too: its next write copies, leaving the child alone
+    parent[300] = "changed"
+    assert child[300] == "300"
+
+
+def test_a_write_leaves_the_published_dataset_alone(cms, book):
+    wo1 = book["work_orders"][0]
+    inv1 = book["invoices"][0]
+    before = cms.get_dataset()
+    cms.get_search_index(before)
+    assert cms.db_update_work_order(wo1, {"Vendor": "Acme Holdings"})
+    after = cms.get_dataset()
+    assert after is not before
+    assert before["work_orders"][wo1]["Vendor"] == "Acme Pvt Ltd"
+    assert cms.get_invoice(before, inv1)["Vendor"] == "Acme Pvt Ltd"
+    assert cms.get_invoice(after, inv1)["Vendor"] == "Acme Holdings"
+    assert cms.search_ids(before, "invoice", "Holdings", ["Vendor"]) == []
+    assert cms.search_ids(after, "invoice", "Holdings", ["Vendor"]) == [inv1]
+    # untouched records are shared, not copied
+    assert after["work_orders"][book["work_orders"][1]] is before["work_orders"][book["work_orders"][1]]
+
+
+def test_snapshot_indexes_match_the_records(cms, book):
+    cms.compact_journal(force=True)
+    dataset = cms._read_snapshot()
+    inv1 = book["invoices"][0]
+    # indexed from the columns; the records are decoded on first read
+    assert type(dataset["invoices"]._buckets[inv1 >> 8][inv1]) is cms.partial
+    assert cms.get_invoice(dataset, inv1)["Vendor"] == "Acme Pvt Ltd"
+    assert type(dataset["invoices"]._buckets[inv1 >> 8][inv1]) is dict
+    reference = cms._empty_dataset()
+    reference["work_orders"] = cms.SharedMap(dataset["work_orders"])
+    reference["invoices"] = cms.SharedMap(dataset["invoices"])
+    cms._index_keys(reference)
+    for name in ("identifiers", "identifier_order", "keys", "nav", "billing", "invoice_numbers", "kpis", "dates"):
+        assert dataset[name] == reference[name], name
+    assert list(dataset["work_orders"]) == book["work_orders"]
+    assert [item["Item Name"] for item in dataset["work_orders"][book["work_orders"][1]]["Items"]] == ["Licence", "Switch"]
+
+
+DATASET_INDEXES = ("identifiers", "identifier_order", "keys", "nav", "billing", "invoice_numbers", "kpis", "dates")
+
+
+# What _open_dataset falls back to without a snapshot: every record read from the tables
+def rebuild(cms):
+    dataset = cms._empty_dataset()
+    with cms._read_transaction() as conn:
+        dataset["seq"] = cms.get_data_version(conn)
+        dataset["work_orders"] = cms.SharedMap((wo["_id"], wo) for wo in cms.db_fetch_work_orders(conn))
+        dataset["invoices"] = cms.SharedMap((inv["_id"], inv) for inv in cms.db_fetch_invoices(conn))
+    cms._index_keys(dataset)
+    return dataset
+
+
+def journal_seqs(cms):
+    with cms.get_db_engine().connect() as conn:
+        return [seq for (seq,) in conn.execute(cms.select(cms.journal_table.c.seq).order_by(cms.journal_table.c.seq))]
+
+
+def snapshot_seq(cms):
+    with open(cms._snapshot_path("manifest.json"), encoding="utf-8") as f:
+        return cms.json.load(f)["seq"]
+
+
+def test_snapshot_and_journal_tail_reopen_as_a_full_rebuild(cms, book, monkeypatch):
+    monkeypatch.setattr(cms, "CMS_SNAPSHOT_EVERY", 10)
+    wo1, wo2, wo3 = book["work_orders"]
+    inv1, inv2, inv3 = book["invoices"]
+    # more events than CMS_SNAPSHOT_EVERY: the writes compact on their own
+    for n in range(12):
+        assert cms.db_update_work_order(wo1, {"Vendor": f"Acme {n}", "Location": ["Delhi", "Noida"][n % 2]})
+    assert cms.db_update_invoice(inv2, {"Payment_Status": "Paid"}, remove_keys=["Payable Amount"])
+    cms.db_add_item(wo3, {"Item Name": "Cabling", "Item Location": "Chennai", "Category": "Hardware", "Qty": 2})
+    cms.db_delete_invoice(inv3)
+    wo4 = cms.db_create_work_order(work_order(4, "Umbrella", "Kolkata", "05/09/2024", 700.0, [("Desk", "Kolkata", "Furniture")]))
+
+    # compaction dropped the events in the snapshot and kept the tail after it
+    seq = snapshot_seq(cms)
+    assert journal_seqs(cms) == list(range(seq + 1, cms.get_data_version() + 1))
+    assert journal_seqs(cms)
+
+    reopened = cms._open_dataset()
+    rebuilt = rebuild(cms)
+    assert reopened["seq"] == rebuilt["seq"] == cms.get_data_version()
+    assert dict(reopened["work_orders"]) == dict(rebuilt["work_orders"])
+    assert dict(reopened["invoices"]) == dict(rebuilt["invoices"])
+    for name in DATASET_INDEXES:
+        assert reopened[name] == rebuilt[name], name
+    assert reopened["work_orders"][wo1]["Vendor"] == "Acme 11"
+    assert [item["Item Name"] for item in reopened["work_orders"][wo3]["Items"]] == ["Support", "Cabling"]
+    assert inv3 not in reopened["invoices"] and wo4 in reopened["work_orders"]
+
+
+def test_compaction_keeps_events_committed_after_its_snapshot(cms, book, monkeypatch):
+    wo2 = book["work_orders"][1]
+    compact, write_snapshot = cms.compact_journal, cms._write_snapshot
+    monkeypatch.setattr(cms, "compact_journal", lambda force=False: None)
+    late = {}
+
+    # another session commits while the snapshot is being written
+    def write_snapshot_then_commit(dataset):
+        write_snapshot(dataset)
+        late["seq"] = dataset["seq"]
+        assert cms.db_update_work_order(wo2, {"Vendor": "Globex Late"})
+
+    monkeypatch.setattr(cms, "_write_snapshot", write_snapshot_then_commit)
+    compact(force=True)
+    assert snapshot_seq(cms) == late["seq"]
+    assert journal_seqs(cms) == [late["seq"] + 1]
+    monkeypatch.setattr(cms, "_write_snapshot", write_snapshot)
+    reopened = cms._open_dataset()
+    assert reopened["seq"] == late["seq"] + 1
+    assert reopened["work_orders"][wo2]["Vendor"] == "Globex Late"
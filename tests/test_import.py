@@ -0,0 +1,147 @@
+import pandas as pd
+import pytest
+
+
+# A sheet as read_import_sheet returns it: text cells, blanks as ""
+def sheet(*rows):
+    return pd.DataFrame(list(rows), dtype=str).fillna("")
+
+
+WO_ROW = {
+    "Contract Number": "CN-9", "Sub-Contract Number": "SC-9", "Work-Order Number": "WO-9",
+    "Vendor": "Hooli", "Location": "Delhi", "Contract Date": "01/05/2024",
+    "Contract Value": "1000", "GST (%)": "18", "% Work-Order": "100",
+    "Item Name": "Server", "Item Location": "Delhi", "Category": "Software", "Qty": "2", "Value per Item": "500",
+}
+
+
+def test_work_order_import_valid_row(cms, book):
+    report, work_orders = cms.validate_work_order_import(sheet(WO_ROW))
+    assert report.to_dict("records") == [{
+        "Row": 2, "Contract Number": "CN-9", "Sub-Contract Number": "SC-9", "Work-Order Number": "WO-9", "Item Name": "Server",
+        "Status": "Valid", "Errors": "", "Notes": "",
+    }]
+    [wo] = work_orders
+    assert (wo["Vendor"], wo["Contract Date"], wo["Item(s) Count"]) == ("Hooli", "01/05/2024", 1)
+    assert wo["Total Contract Value (with GST)"] == pytest.approx(1180.0)
+    [item] = wo["Items"]
+    assert (item["Item Sl. No."], item["Qty"], item["₹ with GST"]) == (1, 2, pytest.approx(1180.0))
+    [wo_id] = cms.db_bulk_create_work_orders(work_orders)
+    assert cms.get_dataset()["work_orders"][wo_id]["Items"][0]["Item Name"] == "Server"
+
+
+@pytest.mark.parametrize("changes, error", [
+    ({"Contract Number": ""}, "Contract Number is required"),
+    ({"Vendor": ""}, "Vendor is required"),
+    ({"Location": ""}, "Location is required"),
+    ({"Sub-Contract Number": ""}, "Sub-Contract Number is required"),
+    ({"Contract Value": "0"}, "Contract Value (₹) must be greater than 0"),
+    ({"Contract Value": "ten"}, "Contract Value is not a number"),
+    ({"GST (%)": ""}, "GST is required"),
+    ({"GST (%)": "120"}, "GST (%) must be at least 0 and at most 100"),
+    ({"Contract Date": "31/02/2024"}, "Contract Date must be dd/mm/yyyy"),
+    ({"Item Name": ""}, "Item Name is required"),
+    ({"Qty": "0"}, "Qty must be at least 1"),
+    ({"Value per Item": "-5"}, "Value per Item must be greater than 0"),
+    ({"Category": "Gadgets"}, "Category must be one of"),
+    ({"Category": "Hardware", "% Warranty": "150"}, "% Warranty must be at least 0 and at most 100"),
+    ({"Category": "AMC", "AMC Duration (Months)": "0"}, "AMC Duration (Months) must be at least 1"),
+    ({"Category": "Solution and Support", "Support Period": "Weekly"}, "Support Period must be one of"),
+    ({"Category": "Staff Cost", "Staff From": "01/05/2024"}, "Staff To is required"),
+    ({"Category": "Staff Cost", "Staff Duration (Months)": "6"}, "Staff Duration (Months) must be at least 12"),
+    # an item of book's first work order, as it is already stored
+    ({"Contract Number": "CN-1", "Sub-Contract Number": "SC-1", "Work-Order Number": "WO-1",
+      "Item Name": "Router", "Item Location": "Delhi", "Category": "Hardware"}, "Duplicate: same Contract, Sub-Contract"),
+])
+def test_work_order_import_rejected_row(cms, book, changes, error):
+    report, work_orders = cms.validate_work_order_import(sheet({**WO_ROW, **changes}))
+    [row] = report.to_dict("records")
+    assert row["Status"] == "Error"
+    assert any(message.startswith(error) for message in row["Errors"].split("; ")), row["Errors"]
+    assert work_orders == []
+
+
+def test_work_order_import_rows_of_one_work_order(cms, book):
+    report, work_orders = cms.validate_work_order_import(sheet(
+        WO_ROW,
+        WO_ROW,  # the same item twice in the file
+        {**WO_ROW, "Work-Order Number": "WO-10", "Item Name": "Disk"},
+        {**WO_ROW, "Work-Order Number": "WO-10", "Item Name": "Tape", "Vendor": "Hooli XYZ"},
+        # a new item under book's existing numbers is only noted
+        {**WO_ROW, "Contract Number": "CN-1", "Sub-Contract Number": "SC-1", "Work-Order Number": "WO-1", "Item Name": "Cable"},
+    ))
+    errors = list(report["Errors"])
+    assert errors[0] == "Not imported: another row of this work order has errors"
+    assert errors[1] == "Duplicate item within the sheet"
+    assert errors[2] == errors[3] == "Vendor differs between rows of this work order"
+    assert list(report["Status"]) == ["Error"] * 4 + ["Valid"]
+    assert report["Notes"][4].startswith("Contract Number exists; Sub-Contract Number exists; Work-Order Number exists")
+    assert [wo["Work-Order Number"] for wo in work_orders] == ["WO-1"]
+
+
+# an invoice against book's second work order, item "Licence" (Software, Qty 1)
+INVOICE_ROW = {
+    "Invoice Number": "INV-9", "Date of Invoice": "01/03/2025", "Invoice Location": "Pune",
+    "Contract Number": "CN-2", "Sub-Contract Number": "SC-2", "Work-Order Number": "WO-2", "Item Name": "Licence",
+    "Claimed Milestones": "Delivery (40.00%)", "Quantity": "1", "Invoice Value": "1000", "Admissible Amount": "2000",
+    "PQP/ Planned Claim": "1000", "Claimed Value": "1000",
+}
+
+
+def test_invoice_import_valid_row(cms, book):
+    dataset = cms.get_dataset()
+    report, invoices = cms.validate_invoice_import(sheet(INVOICE_ROW), dataset)
+    [row] = report.to_dict("records")
+    assert (row["Row"], row["Invoice Number"], row["Status"], row["Errors"]) == (2, "INV-9", "Valid", "")
+    [inv] = invoices
+    assert (inv["_work_order_id"], inv["_item_id"]) == (book["work_orders"][1], book["items"][1])
+    # a blank Payable Amount is the claim less the LD
+    assert (inv["Payable Amount"], inv["Payment_Status"], inv["Claimed Milestones"]) == (1000.0, "Pending", ["Delivery (40.00%)"])
+    [inv_id] = cms.db_bulk_create_invoices(invoices)
+    assert cms.find_invoices_by_number(cms.get_dataset(), "INV-9")[0]["_id"] == inv_id
+
+
+@pytest.mark.parametrize("changes, error", [
+    ({"Invoice Number": ""}, "Invoice Number is required"),
+    ({"Claimed Milestones": ""}, "Claimed Milestones is required"),
+    ({"Date of Invoice": "2025-13-01"}, "Date of Invoice must be dd/mm/yyyy"),
+    ({"Work-Order Number": "WO-404"}, "Work order not found"),
+    ({"Item Name": "Router"}, "Item not found in this work order"),
+    ({"Quantity": "2"}, "Quantity must be a whole number between 1 and the item's Qty"),
+    ({"Invoice Value": "0"}, "Invoice Value must be greater than 0"),
+    ({"Admissible Amount": "abc"}, "Admissible Amount is not a number"),
+    ({"PQP/ Planned Claim": ""}, "PQP/ Planned Claim is required for non-telecom categories"),
+    ({"Claimed Value": ""}, "Claimed Value must be greater than 0"),
+    ({"Liquidity Damage (%)": "10"}, "LD Amount is required when Liquidity Damage % > 0"),
+    ({"Liquidity Damage (%)": "10", "LD Amount": "100", "LD Applied on": "Both"}, "LD Applied on must be one of"),
+    ({"Invoice GST": "180"}, "Invoice GST must be at least 0 and at most 100"),
+    # amounts that do not add up
+    ({"Payable Amount": "2500"}, "Payable Amount exceeds Admissible Amount"),
+    ({"Release Order Amount": "2500"}, "Release Order Amount exceeds Admissible Amount"),
+    ({"Claimed Value": "900", "Liquidity Damage (%)": "10", "LD Amount": "1000", "LD Applied on": "Claimed"},
+     "Payable Amount must be greater than 0"),
+    ({"Date of Invoice RECEIVED at TMD": "01/03/2025", "Date of RELEASE ORDER": "15/04/2025", "Release Order Amount": "900"},
+     "Reason for Delay is required when delay > 30 days"),
+    ({"Warranty Claiming Period": "Weekly"}, "Warranty Claiming Period must be one of"),
+    # book's invoice of the same work order
+    ({"Invoice Number": "inv-2"}, "Invoice Number already exists"),
+])
+def test_invoice_import_rejected_row(cms, book, changes, error):
+    report, invoices = cms.validate_invoice_import(sheet({**INVOICE_ROW, **changes}), cms.get_dataset())
+    [row] = report.to_dict("records")
+    assert row["Status"] == "Error"
+    assert any(message.startswith(error) for message in row["Errors"].split("; ")), row["Errors"]
+    assert invoices == []
+
+
+def test_invoice_import_rows_are_independent(cms, book):
+    report, invoices = cms.validate_invoice_import(sheet(
+        INVOICE_ROW,
+        INVOICE_ROW,  # the same number again in the file
+        # over the PQP: imported, with notes
+        {**INVOICE_ROW, "Invoice Number": "INV-10", "Claimed Value": "1500"},
+    ), cms.get_dataset())
+    assert list(report["Status"]) == ["Valid", "Error", "Valid"]
+    assert report["Errors"][1] == "Duplicate Invoice Number within the sheet"
+    assert "Claimed Value exceeds PQP" in report["Notes"][2] and "Payable Amount exceeds PQP" in report["Notes"][2]
+    assert [(inv["Invoice Number"], inv["Payable Amount"]) for inv in invoices] == [("INV-9", 1000.0), ("INV-10", 1500.0)]
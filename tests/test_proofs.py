@@ -0,0 +1,50 @@
+import asyncio
+import io
+import os
+import time
+
+import tornado.web
+from tornado.httpclient import AsyncHTTPClient
+from tornado.httpserver import HTTPServer
+from tornado.testing import bind_unused_port
+
+
+def fetch(cms, grants, token, **headers):
+    async def run():
+        sock, port = bind_unused_port()
+        application = tornado.web.Application([(r"/app/proof/(?P<token>[^/]+)", cms.ProofHandler, {
+            "grants": grants, "is_active_session": lambda session_id: session_id == "live"})])
+        server = HTTPServer(application)
+        server.add_sockets([sock])
+        try:
+            return await AsyncHTTPClient().fetch(f"http://127.0.0.1:{port}/app/proof/{token}", headers=headers, raise_error=False)
+        finally:
+            server.stop()
+    return asyncio.run(run())
+
+
+def test_proofs_are_stored_once_and_served_in_ranges(cms):
+    data = os.urandom(3 * 1024 * 1024)
+    upload = io.BytesIO(data)
+    upload.name, upload.type = "Scan.PDF", "application/pdf"
+    sha256 = cms.store_proof(upload)
+    again = io.BytesIO(data)
+    again.name = "copy.pdf"
+    assert cms.store_proof(again) == sha256
+    proof = cms.get_proof(sha256)
+    assert proof.path == f"{sha256[:2]}/{sha256}.pdf" and proof.size == len(data)
+
+    grant = {"path": proof.path, "name": "Scan.PDF", "content_type": proof.content_type, "served": False,
+             "session_id": "live", "expires": time.time() + 60}
+    grants = {"token": grant, "closed": {**grant, "session_id": "gone"}, "old": {**grant, "expires": time.time() - 1}}
+    response = fetch(cms, grants, "token", Range="bytes=1000-1999")
+    assert response.code == 206
+    assert response.body == data[1000:2000]
+    assert response.headers["Content-Range"] == f"bytes 1000-1999/{len(data)}"
+    assert response.headers["Content-Type"] == "application/pdf"
+    assert response.headers["Cache-Control"] == "private, no-store"
+    assert grant["served"]
+    assert fetch(cms, grants, "token").body == data
+    # unknown or expired tokens, and tokens of closed sessions, find nothing
+    for token in ("missing", "closed", "old"):
+        assert fetch(cms, grants, token).code == 404
@@ -0,0 +1,117 @@
+def test_work_orders_by_category(cms, book):
+    wo1, wo2, wo3 = book["work_orders"]
+    assert cms.db_query_work_order_ids() == [wo1, wo2, wo3]
+    assert cms.db_query_work_order_ids(categories={"Hardware"}) == [wo1, wo2]
+    assert cms.db_query_work_order_ids(categories=["Software", "Manpower"]) == [wo2, wo3]
+    assert cms.db_query_work_order_ids(categories=[]) == []
+
+
+def test_work_orders_sorted(cms, book):
+    wo1, wo2, wo3 = book["work_orders"]
+    assert cms.db_query_work_order_ids(sort_by="Contract Date") == [wo2, wo1, wo3]
+    assert cms.db_query_work_order_ids(sort_by="Contract Value") == [wo2, wo1, wo3]
+    # ties keep id order
+    assert cms.db_query_work_order_ids(sort_by="Item(s) Count") == [wo2, wo1, wo3]
+    assert cms.db_query_work_order_ids(categories={"Hardware"}, sort_by="Contract Date") == [wo2, wo1]
+
+
+def test_invoices_by_status_and_sorted(cms, book):
+    inv1, inv2, inv3 = book["invoices"]
+    assert cms.db_query_invoice_ids(statuses=["Pending"]) == [inv2, inv3]
+    assert cms.db_query_invoice_ids(statuses=["Paid", "Pending"], sort_by="Invoice Value") == [inv2, inv1, inv3]
+    assert cms.db_query_invoice_ids(sort_by="Invoice Date") == [inv2, inv1, inv3]
+    assert cms.db_query_invoice_ids(sort_by="Contract Number") == [inv1, inv2, inv3]
+
+
+def test_search_work_orders(cms, book):
+    wo1, wo2, wo3 = book["work_orders"]
+    # the work order's own location or any item's
+    assert cms.db_search_work_order_ids(location="Mumbai") == [wo2]
+    assert cms.db_search_work_order_ids(location="Pune") == [wo2]
+    # vendor or item name
+    assert cms.db_search_work_order_ids(names=["Acme Pvt Ltd", "Support"]) == [wo1, wo3]
+    assert cms.db_search_work_order_ids(categories=["Software"]) == [wo2]
+    # total contract value with GST
+    assert cms.db_search_work_order_ids(value_range=(1000, 6000)) == [wo1, wo2]
+    assert cms.db_search_work_order_ids(location="Delhi", categories=["Hardware"]) == [wo1]
+    assert cms.db_search_work_order_ids(location="Nowhere") == []
+
+
+def test_search_invoices(cms, book):
+    inv1, inv2, inv3 = book["invoices"]
+    assert cms.db_search_invoice_ids(location="Pune") == [inv2]
+    assert cms.db_search_invoice_ids(names=["Router"]) == [inv1]
+    assert cms.db_search_invoice_ids(value_range=(100, 1000)) == [inv1, inv2]
+
+
+def test_invoice_vendor_comes_from_its_work_order(cms, book):
+    wo2 = book["work_orders"][1]
+    inv2 = book["invoices"][1]
+    assert cms.db_search_invoice_ids(names=["Globex"]) == [inv2]
+    assert cms.db_update_work_order(wo2, {"Vendor": "Globex Corp"})
+    assert cms.db_search_invoice_ids(names=["Globex"]) == []
+    assert cms.db_search_invoice_ids(names=["Globex Corp"]) == [inv2]
+
+
+def test_distinct_values(cms, book):
+    assert cms.db_distinct_values(cms.items_table.c.category) == {"Hardware", "Software", "Manpower"}
+    assert cms.db_distinct_values(cms.wo_table.c.location, cms.items_table.c.item_location) == {
+        "Delhi", "Mumbai", "Pune", "Chennai"}
+
+
+def test_bulk_updates_reach_the_queries(cms, book):
+    inv1, inv2, inv3 = book["invoices"]
+    wo1, wo2, wo3 = book["work_orders"]
+    assert cms.db_bulk_update_invoices({inv2: {"Payment_Status": "Paid"}, inv3: {"Invoice Value": 5000.0}}) == 2
+    assert cms.db_query_invoice_ids(statuses=["Paid"]) == [inv1, inv2]
+    assert cms.db_query_invoice_ids(sort_by="Invoice Value") == [inv3, inv2, inv1]
+    assert cms.db_bulk_update_work_orders({wo3: {"Location": "Mumbai"}}) == 1
+    assert cms.db_search_work_order_ids(location="Mumbai") == [wo2, wo3]
+
+
+def test_fetch_matches_the_dataset(cms, book):
+    dataset = cms.get_dataset()
+    with cms._read_transaction() as conn:
+        assert cms.get_data_version(conn) == dataset["seq"]
+        work_orders = {wo["_id"]: wo for wo in cms.db_fetch_work_orders(conn)}
+        invoices = {inv["_id"]: inv for inv in cms.db_fetch_invoices(conn)}
+    assert list(work_orders) == book["work_orders"]
+    assert [item["Item Name"] for item in work_orders[book["work_orders"][1]]["Items"]] == ["Licence", "Switch"]
+    assert list(invoices) == book["invoices"]
+    assert invoices[book["invoices"][0]]["_item_id"] == book["items"][0]
+
+
+def test_invoices_are_joined_on_read(cms, book):
+    wo2 = book["work_orders"][1]
+    inv2 = book["invoices"][1]
+    dataset = cms.get_dataset()
+    # the dataset keeps the invoice's own fields; vendor and category are joined
+    assert "Vendor" not in dataset["invoices"][inv2]
+    assert cms.get_invoice(dataset, inv2)["Vendor"] == "Globex"
+    assert cms.get_invoice(dataset, inv2)["Category"] == "Software"
+    assert cms.db_update_work_order(wo2, {"Vendor": "Globex Corp"})
+    dataset = cms.get_dataset()
+    assert [inv["Vendor"] for inv in cms.find_invoices_by_number(dataset, "INV-2")] == ["Globex Corp"]
+    assert cms.search_ids(dataset, "invoice", "Globex Corp", ["Vendor"]) == [inv2]
+
+
+def test_search_index_follows_edits_replayed_together(cms, book):
+    wo3 = book["work_orders"][2]
+    cms.get_search_index(cms.get_dataset())
+    # both events are replayed onto one fork: the tokens go and come back
+    assert cms.db_update_work_order(wo3, {"Sub-Contract Number": "SC-X"})
+    assert cms.db_update_work_order(wo3, {"Sub-Contract Number": "SC-3"})
+    dataset = cms.get_dataset()
+    assert cms.search_ids(dataset, "work_order", "SC-3", ["Sub-Contract Number"]) == [wo3]
+    assert cms.search_ids(dataset, "work_order", "SC-X", ["Sub-Contract Number"]) == []
+
+
+def test_fuzzy_index_follows_a_renamed_vendor(cms, book):
+    wo1 = book["work_orders"][0]
+    cms.get_search_index(cms.get_dataset())
+    # "Acme Pvt Ltd" and "Acme Holdings" share trigrams: one goes, one comes
+    assert cms.db_update_work_order(wo1, {"Vendor": "Acme Holdings"})
+    assert cms.db_update_work_order(wo1, {"Vendor": "Acme Pvt Ltd"})
+    dataset = cms.get_dataset()
+    assert [name for _, _, name in cms.fuzzy_names(dataset, "work_order", ["Vendor"], "Acme Pvt")] == ["Acme Pvt Ltd"]
+    assert cms.fuzzy_ids(dataset, "work_order", ["Vendor"], "Acme Private") == [wo1]
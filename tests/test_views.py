@@ -0,0 +1,38 @@
+import pytest
+from streamlit.testing.v1 import AppTest, element_tree
+
+from conftest import APP
+
+
+# AppTest (streamlit 1.46) reads a single-select segmented control's value back
+# as the selected string and walks it letter by letter; hand it a list
+@pytest.fixture(autouse=True)
+def single_select_value(monkeypatch):
+    value = element_tree.ButtonGroup.value.fget
+    monkeypatch.setattr(element_tree.ButtonGroup, "value",
+                        property(lambda self: [v] if isinstance(v := value(self), str) else v))
+
+
+def open_view(view):
+    at = AppTest.from_file(APP, default_timeout=120).run()
+    at.button_group(key="view_selector").set_value([view]).run()
+    assert not at.exception
+    return at
+
+
+def test_work_order_form_rerun_keeps_the_table(cms, book):
+    at = open_view("New Work Order")
+    [table] = at.dataframe
+    assert list(table.value["Item Name"]) == ["Router", "Licence", "Switch", "Support"]
+    assert not table.proto.HasField("styler")
+
+    # typing into the form reruns the page; the table comes from the view cache
+    # as it is, neither rebuilt nor styled
+    stats = cms.view_cache_stats()
+    at.text_input(key="wo_contract_number").input("CN-9").run()
+    assert not at.exception
+    assert cms.view_cache_stats()["misses"] == stats["misses"]
+    assert cms.view_cache_stats()["hits"] > stats["hits"]
+    [table] = at.dataframe
+    assert not table.proto.HasField("styler")
+    assert list(table.value["Item Name"]) == ["Router", "Licence", "Switch", "Support"]
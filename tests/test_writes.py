@@ -0,0 +1,103 @@
+import pytest
+
+from conftest import invoice, work_order
+
+
+def test_deletes_are_refused_for_linked_or_stale_records(cms, book, monkeypatch):
+    wo1, wo2, wo3 = book["work_orders"]
+    inv1, inv2, inv3 = book["invoices"]
+    dataset = cms.get_dataset()
+    # the invoices are checked in the delete's transaction, whatever the caller saw
+    assert cms.db_delete_work_order(wo1) is False
+    assert cms.db_delete_item(wo1, book["items"][0]) is False
+    # an invoice committed after that check still holds its work order (foreign key)
+    with monkeypatch.context() as patch:
+        patch.setattr(cms, "_has_invoices", lambda conn, wo_id, item_id=None: False)
+        assert cms.db_delete_work_order(wo1) is False
+        assert cms.db_delete_item(wo1, book["items"][0]) is False
+    # a version read before another session's edit is stale
+    wo3_version = dataset["work_orders"][wo3]["_version"]
+    inv3_version = dataset["invoices"][inv3]["_version"]
+    assert cms.db_update_invoice(inv3, {"Payment_Status": "Paid"})
+    assert cms.db_delete_invoice(inv3, expected_version=inv3_version) is False
+    assert cms.db_update_work_order(wo3, {"Vendor": "Initech Ltd"})
+    assert cms.db_delete_invoice(inv3, expected_version=inv3_version + 1)
+    assert cms.db_delete_work_order(wo3, expected_version=wo3_version) is False
+
+    dataset = cms.get_dataset()
+    assert wo1 in dataset["work_orders"] and len(dataset["work_orders"][wo1]["Items"]) == 1
+    assert wo3 in dataset["work_orders"] and inv3 not in dataset["invoices"]
+    # the second item of wo2 has no invoice
+    switch = dataset["work_orders"][wo2]["Items"][1]["_id"]
+    assert cms.db_delete_item(wo2, switch, expected_version=dataset["work_orders"][wo2]["_version"])
+    assert cms.db_delete_work_order(wo3, expected_version=dataset["work_orders"][wo3]["_version"])
+    dataset = cms.get_dataset()
+    assert wo3 not in dataset["work_orders"]
+    assert [item["Item Name"] for item in dataset["work_orders"][wo2]["Items"]] == ["Licence"]
+    assert dataset["work_orders"][wo2]["Item(s) Count"] == 1
+
+
+def test_updates_with_a_stale_version_are_refused(cms, book):
+    wo1 = book["work_orders"][0]
+    inv1 = book["invoices"][0]
+    dataset = cms.get_dataset()
+    wo_version = dataset["work_orders"][wo1]["_version"]
+    inv_version = dataset["invoices"][inv1]["_version"]
+    # another session saves first
+    assert cms.db_update_work_order(wo1, {"Vendor": "Acme Holdings"}, expected_version=wo_version)
+    assert cms.db_update_invoice(inv1, {"Payment_Status": "Pending"}, expected_version=inv_version)
+
+    assert cms.db_update_work_order(wo1, {"Vendor": "Acme Stale"}, expected_version=wo_version) is False
+    assert cms.db_update_invoice(inv1, {"Invoice Value": 1.0}, expected_version=inv_version) is False
+    assert cms.db_update_invoice(inv1, {}, remove_keys=["Payable Amount"], expected_version=inv_version) is False
+    with cms._read_transaction() as conn:
+        [wo] = [wo for wo in cms.db_fetch_work_orders(conn) if wo["_id"] == wo1]
+        [inv] = [inv for inv in cms.db_fetch_invoices(conn) if inv["_id"] == inv1]
+    assert (wo["Vendor"], wo["_version"]) == ("Acme Holdings", wo_version + 1)
+    assert (inv["Invoice Value"], inv["Payable Amount"], inv["_version"]) == (200.0, 180.0, inv_version + 1)
+    dataset = cms.get_dataset()
+    assert dataset["work_orders"][wo1] == wo and dataset["invoices"][inv1] == inv
+
+
+def test_a_closed_financial_year_is_read_only_and_archived(cms, book):
+    wo1, wo2, wo3 = book["work_orders"]
+    inv3 = book["invoices"][2]
+    # wo3 and inv3 fall in FY2023-2024; wo4 is another work order of that year, without invoices
+    wo4 = cms.db_create_work_order(work_order(4, "Umbrella", "Kolkata", "05/01/2024", 700.0, [("Desk", "Kolkata", "Others")]))
+    desk = cms.get_dataset()["work_orders"][wo4]["Items"][0]["_id"]
+    cms.close_financial_year("FY2023-2024")
+    assert cms.closed_year("31/03/2024") == "FY2023-2024" and cms.closed_year("01/04/2024") is None
+
+    closed = [
+        lambda: cms.db_create_work_order(work_order(5, "Hooli", "Delhi", "15/02/2024", 100.0, [("Pen", "Delhi", "Others")])),
+        lambda: cms.db_create_invoice(invoice(wo1, book["items"][0], work_order(1, "", "", "", 1.0, [("Router", "", "")]),
+                                              "INV-9", "31/03/2024", 10.0, "Pending", "Delhi")),
+        lambda: cms.db_update_work_order(wo3, {"Vendor": "Initech Ltd"}),
+        # moving a record into the closed year is a change to that year too
+        lambda: cms.db_update_work_order(wo1, {"Contract Date": "10/05/2023"}),
+        lambda: cms.db_update_invoice(inv3, {"Payment_Status": "Paid"}),
+        lambda: cms.db_add_item(wo4, {"Item Name": "Chair", "Item Location": "Kolkata", "Category": "Others", "Qty": 1}),
+        lambda: cms.db_delete_item(wo4, desk),
+        lambda: cms.db_delete_work_order(wo4),
+        lambda: cms.db_delete_invoice(inv3),
+    ]
+    seq = cms.get_data_version()
+    for write in closed:
+        with pytest.raises(ValueError, match="FY2023-2024 is closed"):
+            write()
+    assert cms.get_data_version() == seq
+    # the open years are not affected
+    assert cms.db_update_work_order(wo1, {"Vendor": "Acme Holdings"})
+
+    # the year's partitions are archives, and a reopened dataset reads them into the frames
+    with open(cms._snapshot_path("manifest.json"), encoding="utf-8") as f:
+        files = cms.json.load(f)["files"]
+    for table in ("work_orders", "wo_items", "invoices"):
+        assert files[table]["FY2023-2024"].endswith(cms.SNAPSHOT_ARCHIVE)
+    dataset = cms._open_dataset()
+    frames = cms.get_frames(dataset, "FY2023-2024")
+    assert sorted(frames["work_orders"]["id"]) == [wo3, wo4]
+    assert sorted(frames["items"]["work_order_id"]) == [wo3, wo4]
+    assert list(frames["invoices"]["id"]) == [inv3]
+    assert {wo3, wo4} <= set(cms.get_frames(dataset)["work_orders"]["id"])
+    assert dataset["work_orders"][wo3]["Vendor"] == "Initech"